@@ -6,7 +6,8 @@ from datetime import datetime
 from flask import Flask, request, jsonify, render_template, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from hmac_utils import generate_hmac, verify_hmac
+from hmac_utils import CHUNK_SIZE, generate_hmac, verify_hmac, generate_chunk_hashes
+from gridfs_utils import append_to_grid_file, check_grid_file_chunks
 from pymongo import MongoClient
 from dotenv import load_dotenv
 from io import BytesIO
@@ -93,7 +94,18 @@ def get_file_records():
         return {}
 
 
-def save_file_record(filename, original_filename, hmac_value, file_size, file_id=None):
+def get_file_record(filename):
+    """Get a single file record from MongoDB."""
+    if collection is None:
+        return None
+    try:
+        return collection.find_one({'filename': filename})
+    except Exception as e:
+        print(f"Error getting file record: {e}")
+        return None
+
+
+def save_file_record(filename, original_filename, hmac_value, file_size, file_id=None, upload_chunk_hashes=None):
     """Save a file record to MongoDB."""
     if collection is None:
         raise Exception("Database connection not available")
@@ -105,7 +117,9 @@ def save_file_record(filename, original_filename, hmac_value, file_size, file_id
             'hmac': hmac_value,
             'upload_time': datetime.now().isoformat(),
             'file_size': file_size,
-            'file_id': file_id  # GridFS file ID
+            'file_id': file_id,  # GridFS file ID
+            # Per-chunk SHA256 at upload time, used as the tamper check baseline
+            'upload_chunk_hashes': upload_chunk_hashes or []
         }
         collection.insert_one(document)
         return True
@@ -178,6 +192,9 @@ def upload_file():
         # Generate HMAC
         hmac_value = generate_hmac(file_content, secret_key)
         
+        # Hash each GridFS chunk so stored chunks can be checked individually
+        chunk_hashes = generate_chunk_hashes(file_content, CHUNK_SIZE)
+        
         # Store file in GridFS cloud storage
         if fs is None:
             return jsonify({'error': 'GridFS cloud storage not available'}), 500
@@ -188,11 +205,12 @@ def upload_file():
             original_name=original_filename,
             content_type=file.content_type or 'application/octet-stream',
             hmac=hmac_value,
+            chunkSize=CHUNK_SIZE,
             upload_time=datetime.utcnow()
         )
         
         # Store HMAC information in MongoDB with GridFS file ID
-        save_file_record(stored_filename, original_filename, hmac_value, len(file_content), str(file_id))
+        save_file_record(stored_filename, original_filename, hmac_value, len(file_content), str(file_id), chunk_hashes)
         
         return jsonify({
             'success': True,
@@ -307,36 +325,72 @@ def simulate_tamper(filename):
         if grid_file is None:
             return jsonify({'error': 'File not found in cloud storage'}), 404
         
-        # Read original content
-        original_content = grid_file.read()
+        # Add tampering text, writing only the last chunk and new chunks
+        tamper_text = b"\n[TAMPERED] This file has been modified!"
+        original_size = grid_file.length
+        rewritten_chunks = append_to_grid_file(
+            db['fs.files'], db['fs.chunks'], grid_file._id, tamper_text,
+            extra_fields={
+                'upload_time': datetime.utcnow(),
+                'tampered': True  # Mark as tampered
+            }
+        )
         
-        # Add tampering text
-        tampered_content = original_content + b"\n[TAMPERED] This file has been modified!"
+        return jsonify({
+            'success': True,
+            'message': 'File has been tampered with for educational purposes in cloud storage',
+            'original_size': original_size,
+            'tampered_size': original_size + len(tamper_text),
+            'new_file_id': str(grid_file._id),
+            'rewritten_chunks': rewritten_chunks
+        })
         
-        # Delete old file and create new tampered version
-        fs.delete(grid_file._id)
+    except Exception as e:
+        return jsonify({'error': f'Tampering simulation failed: {str(e)}'}), 500
+
+
+@app.route('/api/check-chunks/<filename>')
+def check_chunks(filename):
+    """Check a stored file against the chunk hashes recorded at upload."""
+    try:
+        if fs is None:
+            return jsonify({'error': 'GridFS cloud storage not available'}), 500
+        
+        grid_file = fs.find_one({"filename": filename})
+        if grid_file is None:
+            return jsonify({'error': 'File not found in cloud storage'}), 404
+        
+        record = get_file_record(filename)
+        if record is None or 'upload_chunk_hashes' not in record:
+            return jsonify({'error': 'No chunk hashes recorded for this file'}), 404
         
-        # Store tampered file back to GridFS
-        new_file_id = fs.put(
-            tampered_content,
-            filename=filename,
-            original_name=getattr(grid_file, 'original_name', filename),
-            content_type=getattr(grid_file, 'content_type', 'application/octet-stream'),
-            hmac=getattr(grid_file, 'hmac', ''),
-            upload_time=datetime.utcnow(),
-            tampered=True  # Mark as tampered
+        # tail_only skips the unchanged prefix and only checks for appended data
+        tail_only = request.args.get('tail_only', 'false').lower() == 'true'
+        result = check_grid_file_chunks(
+            db['fs.chunks'], grid_file._id, record['upload_chunk_hashes'], tail_only
         )
         
+        # A tail-only pass never verified the prefix, so it is not a full pass
+        if result['modified_chunks'] or grid_file.length != record['file_size']:
+            is_valid = False
+        elif tail_only:
+            is_valid = None
+        else:
+            is_valid = True
+        
         return jsonify({
             'success': True,
-            'message': 'File has been tampered with for educational purposes in cloud storage',
-            'original_size': len(original_content),
-            'tampered_size': len(tampered_content),
-            'new_file_id': str(new_file_id)
+            'is_valid': is_valid,
+            'prefix_verified': not tail_only,
+            'filename': filename,
+            'stored_file_size': record['file_size'],
+            'file_size': grid_file.length,
+            'tail_only': tail_only,
+            **result
         })
         
     except Exception as e:
-        return jsonify({'error': f'Tampering simulation failed: {str(e)}'}), 500
+        return jsonify({'error': f'Chunk check failed: {str(e)}'}), 500
 
 
 @app.route('/api/quick-verify', methods=['POST'])
@@ -0,0 +1,130 @@
+from hmac_utils import hash_chunk, find_modified_chunks
+
+
+def iter_grid_chunks(chunks_collection, file_id, start: int = 0):
+    """
+    Iterate over the raw chunks of a GridFS file, one chunk at a time.
+
+    Args:
+        chunks_collection: The GridFS chunks collection (fs.chunks)
+        file_id: ID of the GridFS file
+        start: Index of the first chunk to read
+
+    Yields:
+        Tuples of (chunk index, chunk data as bytes)
+    """
+    cursor = chunks_collection.find(
+        {'files_id': file_id, 'n': {'$gte': start}},
+        sort=[('n', 1)]
+    )
+    for chunk in cursor:
+        yield chunk['n'], bytes(chunk['data'])
+
+
+def append_to_grid_file(files_collection, chunks_collection, file_id, appended: bytes,
+                        extra_fields: dict = None) -> list:
+    """
+    Append data to a GridFS file in place.
+
+    Only the last partial chunk is read back; the unchanged prefix is neither
+    read nor rewritten.
+
+    This is not atomic: while it runs, a concurrent reader may see a chunk
+    that does not match the stored length. If a write fails, the old tail
+    chunk is restored and new chunks are removed before re-raising.
+
+    Args:
+        files_collection: The GridFS files collection (fs.files)
+        chunks_collection: The GridFS chunks collection (fs.chunks)
+        file_id: ID of the GridFS file
+        appended: The data to append
+        extra_fields: Additional fields to set on the fs.files document
+
+    Returns:
+        List of indices of the chunks rewritten by this append
+    """
+    file_doc = files_collection.find_one({'_id': file_id})
+    if file_doc is None:
+        raise Exception("File not found in cloud storage")
+
+    chunk_size = file_doc['chunkSize']
+    length = file_doc['length']
+
+    # Read the trailing partial chunk, if any, so it can be filled up
+    tail_n = length // chunk_size
+    tail = b''
+    if length % chunk_size:
+        tail_doc = chunks_collection.find_one({'files_id': file_id, 'n': tail_n})
+        if tail_doc is None:
+            raise Exception(f"Corrupt file in cloud storage: chunk {tail_n} is missing")
+        tail = bytes(tail_doc['data'])
+
+    data = tail + appended
+    rewritten_chunks = [
+        tail_n + offset // chunk_size
+        for offset in range(0, len(data), chunk_size)
+    ]
+
+    try:
+        # Write the refilled tail chunk and any new chunks
+        for n in rewritten_chunks:
+            offset = (n - tail_n) * chunk_size
+            chunks_collection.update_one(
+                {'files_id': file_id, 'n': n},
+                {'$set': {'data': data[offset:offset + chunk_size]}},
+                upsert=True
+            )
+
+        files_collection.update_one(
+            {'_id': file_id},
+            {'$set': {**(extra_fields or {}), 'length': length + len(appended)}}
+        )
+    except Exception:
+        # Put the file back the way it was so it is not left corrupt
+        if tail:
+            chunks_collection.update_one(
+                {'files_id': file_id, 'n': tail_n},
+                {'$set': {'data': tail}}
+            )
+            chunks_collection.delete_many({'files_id': file_id, 'n': {'$gt': tail_n}})
+        else:
+            chunks_collection.delete_many({'files_id': file_id, 'n': {'$gte': tail_n}})
+        raise
+
+    return rewritten_chunks
+
+
+def check_grid_file_chunks(chunks_collection, file_id, upload_chunk_hashes: list,
+                           tail_only: bool = False) -> dict:
+    """
+    Check the stored chunks of a GridFS file against its upload-time hashes.
+
+    Chunks are read and hashed one at a time. With tail_only, reading starts
+    at the last chunk recorded at upload, so appended data is detected without
+    rereading the unchanged prefix; edits inside the prefix are not checked.
+
+    Args:
+        chunks_collection: The GridFS chunks collection (fs.chunks)
+        file_id: ID of the GridFS file
+        upload_chunk_hashes: Chunk hashes recorded when the file was uploaded
+        tail_only: Only check chunks from the last upload-time chunk onward
+
+    Returns:
+        Dictionary with the checked chunk range and modified chunk indices
+    """
+    start = max(len(upload_chunk_hashes) - 1, 0) if tail_only else 0
+
+    current_hashes = [
+        hash_chunk(data)
+        for _, data in iter_grid_chunks(chunks_collection, file_id, start)
+    ]
+    modified_chunks = [
+        start + index
+        for index in find_modified_chunks(upload_chunk_hashes[start:], current_hashes)
+    ]
+
+    return {
+        'first_checked_chunk': start,
+        'checked_chunks': len(current_hashes),
+        'modified_chunks': modified_chunks
+    }
@@ -85,3 +85,57 @@ def verify_hmac_for_file(file_path: str, key: str, expected_hmac: str) -> bool:
     except Exception as e:
         print(f"Error verifying file {file_path}: {e}")
         return False
+
+
+# Matches the GridFS default chunk size so chunk hashes line up with stored chunks
+CHUNK_SIZE = 255 * 1024
+
+
+def hash_chunk(data: bytes) -> str:
+    """
+    Generate a SHA256 hash for a single chunk.
+    
+    Args:
+        data: The chunk content as bytes
+        
+    Returns:
+        Hex encoded chunk hash
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def generate_chunk_hashes(data: bytes, chunk_size: int = CHUNK_SIZE) -> list:
+    """
+    Generate a SHA256 hash for every chunk of the given data.
+    
+    Args:
+        data: The data to be hashed (file content as bytes)
+        chunk_size: Size of each chunk in bytes
+        
+    Returns:
+        List of hex encoded chunk hashes, in chunk order
+    """
+    return [
+        hash_chunk(data[offset:offset + chunk_size])
+        for offset in range(0, len(data), chunk_size)
+    ]
+
+
+def find_modified_chunks(expected_hashes: list, current_hashes: list) -> list:
+    """
+    Find chunks whose hashes differ from the expected ones.
+    
+    Args:
+        expected_hashes: Chunk hashes stored at upload time
+        current_hashes: Chunk hashes of the current file content
+        
+    Returns:
+        List of indices of modified, added or removed chunks
+    """
+    return [
+        index
+        for index in range(max(len(expected_hashes), len(current_hashes)))
+        if index >= len(expected_hashes)
+        or index >= len(current_hashes)
+        or expected_hashes[index] != current_hashes[index]
+    ]
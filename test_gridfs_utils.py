@@ -0,0 +1,223 @@
+import unittest
+from hmac_utils import generate_chunk_hashes
+from gridfs_utils import append_to_grid_file, check_grid_file_chunks
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if '$gte' in condition and not value >= condition['$gte']:
+                return False
+            if '$gt' in condition and not value > condition['$gt']:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    """Minimal in-memory stand-in for the pymongo collection methods used."""
+
+    def __init__(self, docs=None, fail_on_update=None):
+        self.docs = list(docs or [])
+        # Number of the update_one call (counting from 1) that should fail
+        self.fail_on_update = fail_on_update
+        self.updates = 0
+        self.reads = 0
+
+    def find_one(self, query):
+        self.reads += 1
+        return next((doc for doc in self.docs if _matches(doc, query)), None)
+
+    def find(self, query, sort=None):
+        docs = [doc for doc in self.docs if _matches(doc, query)]
+        for field, _ in sort or []:
+            docs.sort(key=lambda doc: doc[field])
+        self.reads += len(docs)
+        return docs
+
+    def update_one(self, query, update, upsert=False):
+        self.updates += 1
+        if self.updates == self.fail_on_update:
+            raise Exception("Simulated write failure")
+        doc = self.find_one(query)
+        if doc is None:
+            if not upsert:
+                return
+            doc = dict(query)
+            self.docs.append(doc)
+        doc.update(update['$set'])
+
+    def delete_many(self, query):
+        self.docs = [doc for doc in self.docs if not _matches(doc, query)]
+
+
+class TestGridFSAppend(unittest.TestCase):
+    CHUNK_SIZE = 16
+    TAMPER_TEXT = b"\n[TAMPERED] This file has been modified!"
+
+    def store(self, content):
+        """Store content the way GridFS would and return the fake collections."""
+        files = FakeCollection([{
+            '_id': 'file1',
+            'length': len(content),
+            'chunkSize': self.CHUNK_SIZE
+        }])
+        chunks = FakeCollection([
+            {'files_id': 'file1', 'n': n, 'data': content[offset:offset + self.CHUNK_SIZE]}
+            for n, offset in enumerate(range(0, len(content), self.CHUNK_SIZE))
+        ])
+        return files, chunks
+
+    def reassemble(self, files, chunks):
+        file_doc = files.find_one({'_id': 'file1'})
+        ordered = sorted(chunks.docs, key=lambda doc: doc['n'])
+        self.assertEqual([doc['n'] for doc in ordered], list(range(len(ordered))))
+        return b''.join(doc['data'] for doc in ordered)[:file_doc['length']], file_doc
+
+    def assert_append(self, original, appended):
+        files, chunks = self.store(original)
+
+        rewritten = append_to_grid_file(files, chunks, 'file1', appended)
+
+        content, file_doc = self.reassemble(files, chunks)
+        self.assertEqual(content, original + appended)
+        self.assertEqual(file_doc['length'], len(original + appended))
+        self.assertEqual(set(file_doc), {'_id', 'length', 'chunkSize'})
+        return rewritten
+
+    def test_append_partial_tail(self):
+        """
+        Test appending to a file whose last chunk is partial
+        """
+        rewritten = self.assert_append(b"A" * 40, b"tampered data")
+        self.assertEqual(rewritten, [2, 3])
+
+    def test_append_aligned_tail(self):
+        """
+        Test appending to a file that ends on a chunk boundary
+        """
+        rewritten = self.assert_append(b"B" * 32, b"extra")
+        self.assertEqual(rewritten, [2])
+
+    def test_append_empty_file(self):
+        """
+        Test appending to an empty file
+        """
+        rewritten = self.assert_append(b"", b"extra")
+        self.assertEqual(rewritten, [0])
+
+    def test_append_larger_than_chunk(self):
+        """
+        Test appending more data than fits in one chunk
+        """
+        rewritten = self.assert_append(b"C" * 20, self.TAMPER_TEXT)
+        self.assertEqual(rewritten, [1, 2, 3])
+
+    def test_append_sets_extra_fields(self):
+        """
+        Test extra fields are set on the file document alongside the length
+        """
+        files, chunks = self.store(b"D" * 40)
+
+        append_to_grid_file(files, chunks, 'file1', b"tampered", extra_fields={'tampered': True})
+
+        _, file_doc = self.reassemble(files, chunks)
+        self.assertTrue(file_doc['tampered'])
+        self.assertEqual(file_doc['length'], 48)
+
+    def test_append_missing_tail_chunk(self):
+        """
+        Test a missing tail chunk is reported as a corrupt file
+        """
+        files, chunks = self.store(b"D" * 40)
+        chunks.delete_many({'files_id': 'file1', 'n': {'$gte': 2}})
+
+        with self.assertRaisesRegex(Exception, "Corrupt file in cloud storage: chunk 2 is missing"):
+            append_to_grid_file(files, chunks, 'file1', b"tampered")
+
+    def test_append_failure_restores_file(self):
+        """
+        Test a failed length update leaves the original chunks in place
+        """
+        original = b"E" * 40
+        files, chunks = self.store(original)
+        files.fail_on_update = 1
+
+        with self.assertRaises(Exception):
+            append_to_grid_file(files, chunks, 'file1', self.TAMPER_TEXT)
+
+        content, file_doc = self.reassemble(files, chunks)
+        self.assertEqual(content, original)
+        self.assertEqual(len(chunks.docs), 3)
+        self.assertEqual(file_doc['length'], len(original))
+
+    def test_chunk_write_failure_restores_partial_tail(self):
+        """
+        Test a failed chunk write after the tail was overwritten restores it
+        """
+        original = b"E" * 40
+        files, chunks = self.store(original)
+        chunks.fail_on_update = 2
+
+        with self.assertRaises(Exception):
+            append_to_grid_file(files, chunks, 'file1', self.TAMPER_TEXT)
+
+        content, file_doc = self.reassemble(files, chunks)
+        self.assertEqual(content, original)
+        self.assertEqual(chunks.find_one({'files_id': 'file1', 'n': 2})['data'], original[32:])
+        self.assertEqual(len(chunks.docs), 3)
+        self.assertEqual(file_doc['length'], len(original))
+
+    def test_chunk_write_failure_restores_aligned_tail(self):
+        """
+        Test a failed chunk write on an aligned file removes the new chunks
+        """
+        original = b"E" * 32
+        files, chunks = self.store(original)
+        chunks.fail_on_update = 2
+
+        with self.assertRaises(Exception):
+            append_to_grid_file(files, chunks, 'file1', self.TAMPER_TEXT)
+
+        content, file_doc = self.reassemble(files, chunks)
+        self.assertEqual(content, original)
+        self.assertEqual(len(chunks.docs), 2)
+        self.assertEqual(file_doc['length'], len(original))
+
+    def test_check_detects_append(self):
+        """
+        Test the chunk check reports chunks changed after upload
+        """
+        original = b"F" * 40
+        files, chunks = self.store(original)
+        upload_chunk_hashes = generate_chunk_hashes(original, self.CHUNK_SIZE)
+
+        self.assertEqual(check_grid_file_chunks(chunks, 'file1', upload_chunk_hashes)['modified_chunks'], [])
+
+        append_to_grid_file(files, chunks, 'file1', self.TAMPER_TEXT)
+        result = check_grid_file_chunks(chunks, 'file1', upload_chunk_hashes)
+
+        self.assertEqual(result['modified_chunks'], [2, 3, 4])
+        self.assertEqual(result['checked_chunks'], 5)
+
+    def test_check_tail_only_skips_prefix(self):
+        """
+        Test the tail-only check detects appends without reading the prefix
+        """
+        original = b"G" * 40
+        files, chunks = self.store(original)
+        upload_chunk_hashes = generate_chunk_hashes(original, self.CHUNK_SIZE)
+        append_to_grid_file(files, chunks, 'file1', self.TAMPER_TEXT)
+        chunks.reads = 0
+
+        result = check_grid_file_chunks(chunks, 'file1', upload_chunk_hashes, tail_only=True)
+
+        self.assertEqual(result['first_checked_chunk'], 2)
+        self.assertEqual(result['modified_chunks'], [2, 3, 4])
+        self.assertEqual(chunks.reads, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,11 @@
 import unittest
-from hmac_utils import generate_hmac, verify_hmac
+from hmac_utils import (
+    generate_hmac,
+    verify_hmac,
+    generate_chunk_hashes,
+    hash_chunk,
+    find_modified_chunks
+)
 
 class TestHMAC(unittest.TestCase):
     def test_hmac_verification(self):
@@ -15,5 +21,31 @@ class TestHMAC(unittest.TestCase):
         # Verify HMAC
         self.assertTrue(verify_hmac(message, key, hmac))
 
+    def test_generate_chunk_hashes(self):
+        """
+        Test chunk hashes split data at chunk boundaries
+        """
+        chunk_size = 16
+        data = b"A" * 40
+        
+        hashes = generate_chunk_hashes(data, chunk_size)
+        
+        self.assertEqual(hashes, [hash_chunk(data[0:16]), hash_chunk(data[16:32]), hash_chunk(data[32:40])])
+        self.assertEqual(generate_chunk_hashes(b"", chunk_size), [])
+
+    def test_find_modified_chunks(self):
+        """
+        Test tamper detection reports only the changed and added chunks
+        """
+        chunk_size = 16
+        original = b"C" * 40
+        tampered = original + b"tampered"
+        
+        expected = generate_chunk_hashes(original, chunk_size)
+        current = generate_chunk_hashes(tampered, chunk_size)
+        
+        self.assertEqual(find_modified_chunks(expected, expected), [])
+        self.assertEqual(find_modified_chunks(expected, current), [2])
+
 if __name__ == '__main__':
     unittest.main()